@@ -1,16 +1,13 @@
 """
 ASGI config for eld_backend project.
 
-It exposes the ASGI callable as a module-level variable named ``application``.
+It exposes the ASGI callable as a module-level variable named ``application``,
+built and warmed by ``eld_backend.factory``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
-import os
+from eld_backend.factory import create_asgi_application
 
-from django.core.asgi import get_asgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eld_backend.settings')
-
-application = get_asgi_application()
+application = create_asgi_application()
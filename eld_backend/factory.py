@@ -0,0 +1,63 @@
+"""
+Preload-friendly application factory for eld_backend.
+
+``wsgi.py`` and ``asgi.py`` build their ``application`` here. Besides creating
+the handler, the factory does the one-off work a worker would otherwise pay on
+its first request: resolving the URLconf (which imports DRF, the views and
+serializers), importing the HTTP clients and constructing the route planners.
+
+Under gunicorn with ``preload_app = True`` (see ``gunicorn.conf.py``) this runs
+once in the master process, and the forked workers share the warmed modules
+copy-on-write. Management commands don't import this module, so they keep the
+lazy import path.
+"""
+
+import gc
+import os
+
+
+def warm_up():
+    from django.conf import settings
+    from django.db import connections
+    from django.urls import reverse
+
+    # Reversing a name populates the resolver, importing every view module.
+    reverse('trip-list')
+
+    # trips.services imports these on first use; load them before forking.
+    import httpx  # noqa: F401
+    import requests  # noqa: F401
+
+    from trips.services import get_route_planner, get_async_route_planner
+
+    if settings.ORS_API_KEY:
+        get_route_planner()
+        get_async_route_planner()
+
+    # Database connections must not be shared across forked workers.
+    connections.close_all()
+
+    # Move everything allocated so far out of the collector's reach, so GC
+    # passes in the workers don't touch (and so copy) the shared pages.
+    gc.collect()
+    gc.freeze()
+
+
+def create_wsgi_application():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eld_backend.settings')
+
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    warm_up()
+    return application
+
+
+def create_asgi_application():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eld_backend.settings')
+
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+    warm_up()
+    return application
@@ -3,7 +3,6 @@ Django settings for eld_backend project.
 """
 
 from pathlib import Path
-from datetime import timedelta
 import os
 import dj_database_url
 
@@ -25,8 +24,7 @@ SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-fallback-key')
 DEBUG = os.environ.get('DEBUG', 'False').lower() == 'true'
 ALLOWED_HOSTS = [host.strip() for host in os.environ.get('ALLOWED_HOSTS', 'localhost').split(',')]
 
-ORS_API_KEY = os.environ.get('ORS_API_KEY')
-print(f"ORS_API_KEY loaded: {'Yes' if ORS_API_KEY else 'No'}")
+ORS_API_KEY = os.environ.get('ORS_API_KEY')  # reported by `manage.py check`, see trips/checks.py
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -81,6 +79,28 @@ DATABASES = {
     )
 }
 
+# Cache
+# ORS geocode and route results are cached here. Use Redis in production so
+# every worker (and `manage.py warm_caches`) shares one cache; the local-memory
+# fallback is per process.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+ORS_GEOCODE_CACHE_TTL = int(os.environ.get('ORS_GEOCODE_CACHE_TTL', 30 * 24 * 3600))
+ORS_ROUTE_CACHE_TTL = int(os.environ.get('ORS_ROUTE_CACHE_TTL', 7 * 24 * 3600))
+
 # CORS settings
 cors_origins = os.environ.get('CORS_ALLOWED_ORIGINS', '')
 CORS_ALLOWED_ORIGINS = [origin.strip() for origin in cors_origins.split(',') if origin.strip()]
@@ -105,14 +125,6 @@ REST_FRAMEWORK = {
     ],
 }
 
-SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
-    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
-    'ROTATE_REFRESH_TOKENS': False,
-    'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': False,
-}
-
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',},
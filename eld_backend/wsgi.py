@@ -1,16 +1,13 @@
 """
 WSGI config for eld_backend project.
 
-It exposes the WSGI callable as a module-level variable named ``application``.
+It exposes the WSGI callable as a module-level variable named ``application``,
+built and warmed by ``eld_backend.factory``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
-import os
+from eld_backend.factory import create_wsgi_application
 
-from django.core.wsgi import get_wsgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eld_backend.settings')
-
-application = get_wsgi_application()
+application = create_wsgi_application()
@@ -0,0 +1,13 @@
+"""
+Gunicorn configuration, picked up automatically from the working directory.
+
+The app is preloaded in the master (see eld_backend/factory.py) so workers fork
+with Django, DRF and the planner already imported and share them copy-on-write.
+"""
+
+import os
+
+wsgi_app = os.environ.get('GUNICORN_APP', 'eld_backend.wsgi:application')
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+preload_app = True
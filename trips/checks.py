@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def ors_api_key_check(app_configs, **kwargs):
+    if not settings.ORS_API_KEY:
+        return [
+            Warning(
+                "ORS_API_KEY is not set; trip planning requests will fail.",
+                hint="Add ORS_API_KEY to the environment or to .env.",
+                id="trips.W001",
+            )
+        ]
+    return []
@@ -0,0 +1,224 @@
+import gzip
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from trips.models import Trip, TripLeg, DailyLog
+from trips.stats import add_to_totals, archive_totals, contribution, new_totals, stats_keys
+
+ARCHIVE_NAME = re.compile(r"^trips-(\d+)-(\d+)\.ndjson\.gz$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Move trips created before a cutoff into gzip-compressed NDJSON files "
+        "and delete them in small batches. Each batch is written to its own "
+        "file before its rows are deleted in a short transaction, so the "
+        "command can be stopped at any point and simply re-run. The stats "
+        "tables keep archived trips; the same transaction moves them into the "
+        "rows' archived_* counters, which rebuild_stats preserves."
+    )
+
+    def add_arguments(self, parser):
+        cutoff = parser.add_mutually_exclusive_group(required=True)
+        cutoff.add_argument(
+            "--before", help="Archive trips created before this date (YYYY-MM-DD)."
+        )
+        cutoff.add_argument(
+            "--older-than-days",
+            type=int,
+            help="Archive trips created more than this many days ago.",
+        )
+        parser.add_argument(
+            "--output-dir",
+            default="archive",
+            help="Directory for the archive files (default: ./archive).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Trips archived and deleted per transaction (default: 200).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.5,
+            help="Seconds to pause between batches (default: 0.5).",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            help="Stop after this many batches; re-run to continue.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = self._cutoff(options)
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer")
+
+        output_dir = Path(options["output_dir"])
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        archived = 0
+        batches = 0
+        started = time.monotonic()
+
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            # Earlier batches are already gone, so the oldest remaining trips
+            # are always the next batch. This is what makes re-runs resume.
+            trips = list(
+                Trip.objects.filter(created_at__lt=cutoff)
+                .order_by("pk")
+                .values()[:batch_size]
+            )
+            if not trips:
+                break
+
+            path = self._write_batch(output_dir, trips)
+            self._delete_batch(trips)
+
+            archived += len(trips)
+            batches += 1
+            self.stdout.write(f"Archived {len(trips)} trips to {path}")
+
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {archived} trips in {batches} batches "
+                f"({time.monotonic() - started:.1f}s)"
+            )
+        )
+
+    def _cutoff(self, options):
+        if options["before"]:
+            try:
+                day = parse_date(options["before"])
+            except ValueError:
+                # Well formed but impossible, e.g. 2026-02-30.
+                day = None
+            if day is None:
+                raise CommandError("--before must be a date in YYYY-MM-DD format")
+            return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        if options["older_than_days"] < 0:
+            raise CommandError("--older-than-days must not be negative")
+        return timezone.now() - timedelta(days=options["older_than_days"])
+
+    def _write_batch(self, output_dir, trips):
+        """Write one trip per line, with its legs and logs nested inside."""
+        trip_ids = [trip["id"] for trip in trips]
+        legs = self._children(TripLeg, trip_ids, "sequence")
+        logs = self._children(DailyLog, trip_ids, "day_number")
+
+        # Named by pk range, so a batch re-archived after an interrupted run
+        # overwrites its earlier file; _prune_overlapping handles the case
+        # where the batch size changed in between.
+        path = output_dir / f"trips-{trip_ids[0]:012d}-{trip_ids[-1]:012d}.ndjson.gz"
+        tmp_path = path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for trip in trips:
+                trip["legs"] = legs.get(trip["id"], [])
+                trip["daily_logs"] = logs.get(trip["id"], [])
+                f.write(json.dumps(trip, cls=DjangoJSONEncoder))
+                f.write("\n")
+        os.replace(tmp_path, path)
+        self._prune_overlapping(output_dir, path, trip_ids)
+        return path
+
+    def _prune_overlapping(self, output_dir, path, trip_ids):
+        """Drop this batch's trips from any other file that also holds them.
+
+        A run stopped between writing and deleting a batch leaves that file
+        behind; if the re-run uses a different batch size, the same trips land
+        in a differently named file. Only lines for trips in the current batch
+        are removed, so other files' contents are never lost.
+        """
+        batch = set(trip_ids)
+        low, high = min(batch), max(batch)
+        for other in output_dir.glob("trips-*.ndjson.gz"):
+            match = ARCHIVE_NAME.match(other.name)
+            if other == path or not match:
+                continue
+            if int(match.group(2)) < low or int(match.group(1)) > high:
+                continue
+
+            with gzip.open(other, "rt", encoding="utf-8") as f:
+                lines = f.readlines()
+            kept = [line for line in lines if json.loads(line)["id"] not in batch]
+            if len(kept) == len(lines):
+                continue
+            if not kept:
+                other.unlink()
+                continue
+            tmp_path = other.with_suffix(".tmp")
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                f.writelines(kept)
+            os.replace(tmp_path, other)
+
+    def _children(self, model, trip_ids, order_field):
+        grouped = {}
+        for row in model.objects.filter(trip_id__in=trip_ids).order_by(
+            "trip_id", order_field
+        ).values():
+            grouped.setdefault(row["trip_id"], []).append(row)
+        return grouped
+
+    def _delete_batch(self, trips):
+        trip_ids = [trip["id"] for trip in trips]
+        # Plain DELETE statements: the ORM's cascade collector would load
+        # every leg and log into memory first.
+        placeholders = ", ".join(["%s"] * len(trip_ids))
+        quote = connection.ops.quote_name
+        # Read the logs' driving hours before they are deleted.
+        totals = self._stats_totals(trips)
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model, column in (
+                (DailyLog, "trip_id"),
+                (TripLeg, "trip_id"),
+                (Trip, "id"),
+            ):
+                cursor.execute(
+                    f"DELETE FROM {quote(model._meta.db_table)} "
+                    f"WHERE {quote(column)} IN ({placeholders})",
+                    trip_ids,
+                )
+            # Last, so the shared stats rows are locked only until commit.
+            archive_totals(totals)
+
+    def _stats_totals(self, trips):
+        driving_hours = dict(
+            DailyLog.objects.filter(trip_id__in=[trip["id"] for trip in trips])
+            .values("trip_id")
+            .annotate(total=Sum("driving_hours"))
+            .values_list("trip_id", "total")
+        )
+        totals = new_totals()
+        for trip in trips:
+            keys = stats_keys(
+                timezone.localdate(trip["created_at"]),
+                trip["pickup_location"],
+                trip["dropoff_location"],
+                trip["user_id"],
+            )
+            deltas = contribution(
+                trip["total_distance"],
+                trip["estimated_duration"],
+                driving_hours.get(trip["id"]),
+                trip["deadhead_distance"],
+            )
+            add_to_totals(totals, keys, deltas)
+        return totals
+
@@ -0,0 +1,85 @@
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Report where worker start-up time goes. Imports the application "
+        "module in a fresh interpreter under `python -X importtime` and prints "
+        "the slowest modules and the total per top-level package."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--module",
+            default="eld_backend.wsgi",
+            help="Module a worker imports on boot (default: eld_backend.wsgi).",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=20,
+            help="Number of slowest modules to list (default: 20).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {options['module']}"],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        )
+        wall = time.monotonic() - started
+        if result.returncode != 0:
+            raise CommandError(f"Importing {options['module']} failed:\n{result.stderr}")
+
+        modules = self._parse(result.stderr)
+        total_us = sum(self_us for _, self_us, _ in modules)
+
+        packages = defaultdict(int)
+        for name, self_us, _ in modules:
+            packages[name.split(".")[0]] += self_us
+
+        self.stdout.write(
+            f"Imported {len(modules)} modules in {total_us / 1000:.1f}ms "
+            f"(interpreter wall time {wall * 1000:.0f}ms)"
+        )
+        self.stdout.write(
+            f"Self time of {options['module']} includes the code it runs on "
+            f"import, such as building and warming the application."
+        )
+
+        self.stdout.write(f"\nSlowest {options['top']} modules (self / cumulative ms):")
+        for name, self_us, cumulative_us in sorted(modules, key=lambda m: -m[1])[
+            : options["top"]
+        ]:
+            self.stdout.write(
+                f"  {self_us / 1000:8.1f} {cumulative_us / 1000:8.1f}  {name}"
+            )
+
+        self.stdout.write("\nBy top-level package (self ms, share):")
+        for package, self_us in sorted(packages.items(), key=lambda p: -p[1]):
+            share = 100 * self_us / total_us if total_us else 0
+            if share < 0.5:
+                break
+            self.stdout.write(f"  {self_us / 1000:8.1f} {share:5.1f}%  {package}")
+
+    def _parse(self, output):
+        """(module, self µs, cumulative µs) for each `-X importtime` line."""
+        modules = []
+        for line in output.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            fields = line[len("import time:"):].split("|")
+            if len(fields) != 3 or not fields[0].strip().isdigit():
+                continue  # column header
+            modules.append(
+                (fields[2].strip(), int(fields[0]), int(fields[1]))
+            )
+        return modules
@@ -0,0 +1,123 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+from trips.models import Trip, DailyFleetStats, LaneStats, DriverStats
+from trips.stats import (
+    ARCHIVED,
+    COUNTERS,
+    LOCK_ORDER,
+    add_to_totals,
+    archived_totals,
+    contribution,
+    new_totals,
+    stats_keys,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily, lane and driver stats tables from the Trip rows in "
+        "the database. Trips removed by archive_trips are kept: each row's "
+        "archived_* counters are added to what is found in Trip, so days, "
+        "lanes and drivers keep their history. Trips are read in primary-key "
+        "chunks so memory stays bounded by the number of aggregate rows, not "
+        "the number of trips."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Trips read per query (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be a positive integer")
+
+        totals = new_totals()
+        processed = 0
+        last_pk = 0
+
+        while True:
+            rows = list(
+                Trip.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .annotate(
+                    trip_date=TruncDate("created_at"),
+                    logged_driving_hours=Sum("daily_logs__driving_hours"),
+                )
+                .values(
+                    "pk",
+                    "trip_date",
+                    "pickup_location",
+                    "dropoff_location",
+                    "user_id",
+                    "total_distance",
+                    "estimated_duration",
+                    "deadhead_distance",
+                    "logged_driving_hours",
+                )[:chunk_size]
+            )
+            if not rows:
+                break
+
+            for row in rows:
+                deltas = contribution(
+                    row["total_distance"],
+                    row["estimated_duration"],
+                    row["logged_driving_hours"],
+                    row["deadhead_distance"],
+                )
+                keys = stats_keys(
+                    row["trip_date"],
+                    row["pickup_location"],
+                    row["dropoff_location"],
+                    row["user_id"],
+                )
+                add_to_totals(totals, keys, deltas)
+
+            processed += len(rows)
+            last_pk = rows[-1]["pk"]
+            self.stdout.write(f"Aggregated {processed} trips")
+
+        # Swap the tables in one transaction so readers never see them empty.
+        with transaction.atomic():
+            grouped = self._rows(totals, archived_totals())
+            for model in LOCK_ORDER:
+                model.objects.all().delete()
+                model.objects.bulk_create(grouped[model], batch_size=chunk_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt stats from {processed} trips: "
+                f"{len(grouped[DailyFleetStats])} days, "
+                f"{len(grouped[LaneStats])} lanes, "
+                f"{len(grouped[DriverStats])} drivers"
+            )
+        )
+
+    def _rows(self, totals, archived):
+        """Unsaved rows per model: live totals plus the archived counters."""
+        zero = dict.fromkeys(COUNTERS, Decimal("0"))
+        grouped = defaultdict(list)
+        for key in totals.keys() | archived.keys():
+            model, lookup = key
+            live = totals.get(key, zero)
+            gone = archived.get(key, zero)
+            grouped[model].append(
+                model(
+                    **dict(lookup),
+                    **{name: live[name] + gone[name] for name in COUNTERS},
+                    **{ARCHIVED[name]: gone[name] for name in COUNTERS},
+                )
+            )
+        return grouped
+
@@ -0,0 +1,170 @@
+import asyncio
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from trips.models import Trip
+from trips.services import AsyncRoutePlanner, RateLimiter
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-populate the ORS geocode and route caches from trip history. "
+        "The most frequent locations are geocoded, then the most frequent "
+        "waypoint chains (current -> pickup -> stops -> dropoff) are routed, "
+        "exactly as RoutePlanner requests them. Entries already cached are "
+        "not fetched again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--locations",
+            type=int,
+            default=500,
+            help="Number of most frequent locations to geocode (default: 500).",
+        )
+        parser.add_argument(
+            "--lanes",
+            type=int,
+            default=200,
+            help="Number of most frequent routes to fetch (default: 200).",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Only mine trips from the last N days (default: all history).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Maximum ORS requests in flight (default: 4).",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=5.0,
+            help="Maximum ORS requests per second (default: 5).",
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["rate"] <= 0:
+            raise CommandError("--concurrency and --rate must be positive")
+
+        backend = settings.CACHES["default"]["BACKEND"]
+        if backend.endswith("LocMemCache"):
+            self.stderr.write(
+                self.style.WARNING(
+                    "The default cache is local to this process; warmed entries "
+                    "will not be visible to the web workers. Set REDIS_URL."
+                )
+            )
+
+        trips = Trip.objects.all()
+        if options["days"] is not None:
+            trips = trips.filter(
+                created_at__gte=timezone.now() - timedelta(days=options["days"])
+            )
+
+        started = time.monotonic()
+        location_counts = self._location_counts(trips)
+        lanes = list(
+            trips.values("current_location", "pickup_location", "stops", "dropoff_location")
+            .annotate(trip_count=Count("id"))
+            .order_by("-trip_count")[: options["lanes"]]
+        )
+        total_trips = trips.count()
+        self.stdout.write(
+            f"Mined {total_trips} trips in {time.monotonic() - started:.1f}s: "
+            f"{len(location_counts)} distinct locations"
+        )
+
+        top_locations = location_counts.most_common(options["locations"])
+        location_failures, lane_failures, elapsed = asyncio.run(
+            self._warm(
+                [location for location, _ in top_locations],
+                lanes,
+                options["concurrency"],
+                options["rate"],
+            )
+        )
+
+        total_occurrences = sum(location_counts.values())
+        warmed_occurrences = sum(
+            count for location, count in top_locations if location not in location_failures
+        )
+        warmed_trips = sum(
+            lane["trip_count"] for i, lane in enumerate(lanes) if i not in lane_failures
+        )
+
+        self.stdout.write(
+            f"Geocoded {len(top_locations) - len(location_failures)}/{len(top_locations)} "
+            f"locations, covering {self._percent(warmed_occurrences, total_occurrences)} "
+            f"of location lookups"
+        )
+        self.stdout.write(
+            f"Routed {len(lanes) - len(lane_failures)}/{len(lanes)} lanes, covering "
+            f"{self._percent(warmed_trips, total_trips)} of trips"
+        )
+        for location, error in location_failures.items():
+            self.stderr.write(f"  geocode failed for {location!r}: {error}")
+        for i, error in lane_failures.items():
+            lane = lanes[i]
+            self.stderr.write(
+                f"  route failed for {lane['pickup_location']!r} -> "
+                f"{lane['dropoff_location']!r}: {error}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Warmed caches in {elapsed:.1f}s"))
+
+    def _location_counts(self, trips):
+        counts = Counter()
+        for field in ("current_location", "pickup_location", "dropoff_location"):
+            for row in trips.values(field).annotate(n=Count("id")):
+                counts[row[field]] += row["n"]
+        for row in trips.exclude(stops=[]).values("stops").annotate(n=Count("id")):
+            for stop in row["stops"] or []:
+                counts[stop] += row["n"]
+        return counts
+
+    async def _warm(self, locations, lanes, concurrency, rate):
+        try:
+            planner = AsyncRoutePlanner(rate_limiter=RateLimiter(rate))
+        except ValueError as e:
+            raise CommandError(str(e))
+        semaphore = asyncio.Semaphore(concurrency)
+        started = time.monotonic()
+
+        async def bounded(coro):
+            async with semaphore:
+                try:
+                    await coro
+                except Exception as e:
+                    return e
+                return None
+
+        # Locations first, so lane routing mostly hits the geocode cache.
+        results = await asyncio.gather(
+            *(bounded(planner.geocode(location)) for location in locations)
+        )
+        location_failures = {
+            location: error for location, error in zip(locations, results) if error
+        }
+
+        async def route_lane(lane):
+            locations = planner.trip_locations(lane)
+            coords = [await planner.geocode(location) for location in locations]
+            await planner.calculate_route(coords)
+
+        results = await asyncio.gather(*(bounded(route_lane(lane)) for lane in lanes))
+        lane_failures = {i: error for i, error in enumerate(results) if error}
+
+        await planner.client.aclose()
+        return location_failures, lane_failures, time.monotonic() - started
+
+    def _percent(self, part, whole):
+        return f"{100 * part / whole:.1f}%" if whole else "n/a"
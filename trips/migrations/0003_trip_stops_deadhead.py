@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0002_trip_current_coords_trip_dropoff_coords_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='deadhead_distance',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='stop_coords',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='stops',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
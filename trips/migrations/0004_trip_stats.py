@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0003_trip_stops_deadhead'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFleetStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trip_count', models.IntegerField(default=0)),
+                ('total_miles', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('driving_hours', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_duration', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('date', models.DateField(unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='DriverStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trip_count', models.IntegerField(default=0)),
+                ('total_miles', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('driving_hours', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_duration', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trip_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='LaneStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trip_count', models.IntegerField(default=0)),
+                ('total_miles', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('driving_hours', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_duration', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('pickup_location', models.CharField(max_length=255)),
+                ('dropoff_location', models.CharField(max_length=255)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('pickup_location', 'dropoff_location'), name='unique_lane')],
+            },
+        ),
+    ]
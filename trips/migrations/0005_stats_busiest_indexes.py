@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0004_trip_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='driverstats',
+            index=models.Index(fields=['-trip_count', 'id'], name='driver_stats_busiest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lanestats',
+            index=models.Index(fields=['-trip_count', 'id'], name='lane_stats_busiest_idx'),
+        ),
+    ]
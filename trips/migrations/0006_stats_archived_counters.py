@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0005_stats_busiest_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyfleetstats',
+            name='archived_driving_hours',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='dailyfleetstats',
+            name='archived_total_duration',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='dailyfleetstats',
+            name='archived_total_miles',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='dailyfleetstats',
+            name='archived_trip_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='driverstats',
+            name='archived_driving_hours',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='driverstats',
+            name='archived_total_duration',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='driverstats',
+            name='archived_total_miles',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='driverstats',
+            name='archived_trip_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lanestats',
+            name='archived_driving_hours',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='lanestats',
+            name='archived_total_duration',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='lanestats',
+            name='archived_total_miles',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='lanestats',
+            name='archived_trip_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -11,6 +11,7 @@ class Trip(models.Model):
     current_location = models.CharField(max_length=255)
     pickup_location = models.CharField(max_length=255)
     dropoff_location = models.CharField(max_length=255)
+    stops = models.JSONField(default=list, blank=True)  # between pickup and dropoff
     current_cycle_used = models.DecimalField(max_digits=5, decimal_places=2)
     cycle_type = models.CharField(
         max_length=20, choices=CYCLE_CHOICES, default="70hrs/8days"
@@ -24,12 +25,16 @@ class Trip(models.Model):
     estimated_duration = models.DecimalField(
         max_digits=6, decimal_places=2, null=True, blank=True
     )
+    deadhead_distance = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, blank=True
+    )
 
     # Map-related fields
     route_geometry = models.JSONField(null=True, blank=True)
     current_coords = models.JSONField(null=True, blank=True)  # [lon, lat]
     pickup_coords = models.JSONField(null=True, blank=True)   # [lon, lat]
     dropoff_coords = models.JSONField(null=True, blank=True)  # [lon, lat]
+    stop_coords = models.JSONField(null=True, blank=True)     # [[lon, lat], ...]
 
     def __str__(self):
         return f"Trip {self.id} ({self.current_location} → {self.dropoff_location})"
@@ -60,3 +65,64 @@ class DailyLog(models.Model):
 
     def __str__(self):
         return f"Day {self.day_number} Log for Trip {self.trip.id}"
+
+
+class TripStats(models.Model):
+    """Running totals kept in step with Trip rows by ``trips.stats``.
+
+    Dashboards read these instead of scanning Trip/DailyLog history.
+    """
+
+    trip_count = models.IntegerField(default=0)
+    total_miles = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    driving_hours = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_duration = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # hours
+
+    # The part of the totals above that comes from trips moved out by
+    # archive_trips. rebuild_stats adds it back to what it finds in Trip.
+    archived_trip_count = models.IntegerField(default=0)
+    archived_total_miles = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    archived_driving_hours = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    archived_total_duration = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailyFleetStats(TripStats):
+    date = models.DateField(unique=True)  # day the trip was planned
+
+    def __str__(self):
+        return f"Fleet stats for {self.date}"
+
+
+class LaneStats(TripStats):
+    pickup_location = models.CharField(max_length=255)
+    dropoff_location = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["pickup_location", "dropoff_location"], name="unique_lane"
+            ),
+        ]
+        indexes = [
+            # Matches the busiest-first ordering of the lanes endpoint.
+            models.Index(fields=["-trip_count", "id"], name="lane_stats_busiest_idx"),
+        ]
+
+    def __str__(self):
+        return f"Lane stats ({self.pickup_location} → {self.dropoff_location})"
+
+
+class DriverStats(TripStats):
+    user = models.OneToOneField(User, related_name="trip_stats", on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            # Matches the busiest-first ordering of the drivers endpoint.
+            models.Index(fields=["-trip_count", "id"], name="driver_stats_busiest_idx"),
+        ]
+
+    def __str__(self):
+        return f"Driver stats for {self.user}"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Trip, TripLeg, DailyLog
+from .models import Trip, TripLeg, DailyLog, DailyFleetStats, LaneStats, DriverStats
 
 
 class TripLegSerializer(serializers.ModelSerializer):
@@ -36,6 +36,7 @@ class TripSerializer(serializers.ModelSerializer):
     # Cast decimals to floats here too
     total_distance = serializers.FloatField()
     estimated_duration = serializers.FloatField()
+    deadhead_distance = serializers.FloatField(allow_null=True, required=False)
     current_cycle_used = serializers.FloatField()
 
     class Meta:
@@ -64,6 +65,7 @@ class TripSerializer(serializers.ModelSerializer):
                 coords.append(obj.current_coords)
             if getattr(obj, "pickup_coords", None):
                 coords.append(obj.pickup_coords)
+            coords.extend(getattr(obj, "stop_coords", None) or [])
             if getattr(obj, "dropoff_coords", None):
                 coords.append(obj.dropoff_coords)
 
@@ -76,6 +78,53 @@ class TripSerializer(serializers.ModelSerializer):
             markers["current"] = obj.current_coords
         if getattr(obj, "pickup_coords", None):
             markers["pickup"] = obj.pickup_coords
+        if getattr(obj, "stop_coords", None):
+            markers["stops"] = obj.stop_coords
         if getattr(obj, "dropoff_coords", None):
             markers["dropoff"] = obj.dropoff_coords
         return markers or None
+
+
+# The archived_* counters are bookkeeping for rebuild_stats, not for display.
+STATS_EXCLUDE = [
+    "id",
+    "archived_trip_count",
+    "archived_total_miles",
+    "archived_driving_hours",
+    "archived_total_duration",
+]
+
+
+class TripStatsSerializer(serializers.ModelSerializer):
+    # Cast decimals to float and derive the average from the running totals
+    total_miles = serializers.FloatField()
+    driving_hours = serializers.FloatField()
+    total_duration = serializers.FloatField()
+    average_duration = serializers.SerializerMethodField()
+
+    def get_average_duration(self, obj):
+        if not obj.trip_count:
+            return None
+        return round(float(obj.total_duration) / obj.trip_count, 2)
+
+
+class DailyFleetStatsSerializer(TripStatsSerializer):
+    date = serializers.DateField(format="%Y-%m-%d")
+
+    class Meta:
+        model = DailyFleetStats
+        exclude = STATS_EXCLUDE
+
+
+class LaneStatsSerializer(TripStatsSerializer):
+    class Meta:
+        model = LaneStats
+        exclude = STATS_EXCLUDE
+
+
+class DriverStatsSerializer(TripStatsSerializer):
+    username = serializers.CharField(source="user.username", read_only=True)
+
+    class Meta:
+        model = DriverStats
+        exclude = STATS_EXCLUDE
@@ -1,10 +1,55 @@
-import requests
+import asyncio
+import functools
+import hashlib
+import json
+import logging
 import os
 from datetime import datetime, timedelta
 import polyline
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+# The ORS cache is an optimisation: if the backend is down, plans fall
+# through to ORS instead of failing.
+
+def _cache_get(key):
+    try:
+        return cache.get(key)
+    except Exception:
+        logger.warning("ORS cache read failed for %s", key, exc_info=True)
+        return None
+
+
+def _cache_set(key, value, timeout):
+    try:
+        cache.set(key, value, timeout)
+    except Exception:
+        logger.warning("ORS cache write failed for %s", key, exc_info=True)
+
+
+async def _acache_get(key):
+    try:
+        return await cache.aget(key)
+    except Exception:
+        logger.warning("ORS cache read failed for %s", key, exc_info=True)
+        return None
+
+
+async def _acache_set(key, value, timeout):
+    try:
+        await cache.aset(key, value, timeout)
+    except Exception:
+        logger.warning("ORS cache write failed for %s", key, exc_info=True)
 
 
 class RoutePlanner:
+    # ORS directions accepts at most 50 waypoints; current, pickup and dropoff
+    # take three of them.
+    MAX_STOPS = 47
+
     def __init__(self):
         self.api_key = os.getenv("ORS_API_KEY")
         self.base_url = "https://api.openrouteservice.org"
@@ -12,45 +57,130 @@ class RoutePlanner:
         if not self.api_key:
             raise ValueError("Missing ORS_API_KEY in environment variables")
 
+    @property
+    def session(self):
+        return get_http_session()
+
     def geocode(self, location: str):
-        url = f"{self.base_url}/geocode/search"
-        params = {"api_key": self.api_key, "text": location}
+        key = self._geocode_cache_key(location)
+        coords = _cache_get(key)
+        if coords is not None:
+            return coords
+
+        url, params = self._geocode_request(location)
 
-        r = requests.get(url, params=params)
+        r = self.session.get(url, params=params)
         r.raise_for_status()
-        data = r.json()
+        coords = self._parse_geocode(r.json(), location)
+        _cache_set(key, coords, settings.ORS_GEOCODE_CACHE_TTL)
+        return coords
+
+    def calculate_route(self, coordinates):
+        key = self._route_cache_key(coordinates)
+        route = _cache_get(key)
+        if route is not None:
+            return route
+
+        url, kwargs = self._route_request(coordinates)
+
+        r = self.session.post(url, **kwargs)
+        r.raise_for_status()
+        route = self._parse_route(r.json())
+        _cache_set(key, route, settings.ORS_ROUTE_CACHE_TTL)
+        return route
+
+    def duration_matrix(self, coordinates):
+        url, kwargs = self._matrix_request(coordinates)
+
+        r = self.session.post(url, **kwargs)
+        r.raise_for_status()
+        return self._parse_matrix(r.json())
+
+    def plan_trip_with_rest_stops(self, trip_data):
+        locations = self.trip_locations(trip_data)
+        coords = [self.geocode(location) for location in locations]
+
+        if self._should_optimize(trip_data, locations):
+            order = self._optimize_stop_order(self.duration_matrix(coords))
+            locations = [locations[i] for i in order]
+            coords = [coords[i] for i in order]
+
+        route_result = self.calculate_route(coords)
 
+        return self._build_plan(trip_data, locations, coords, route_result)
+
+    # ---------------------- ORS Helpers ----------------------
+
+    def _geocode_cache_key(self, location):
+        # Case and spacing don't change the geocode result.
+        normalized = " ".join(location.lower().split())
+        return "ors:geocode:" + hashlib.sha1(normalized.encode()).hexdigest()
+
+    def _route_cache_key(self, coordinates):
+        # ~1m precision, so re-geocoded points still share a key.
+        rounded = [[round(c, 5) for c in point] for point in coordinates]
+        return "ors:route:" + hashlib.sha1(json.dumps(rounded).encode()).hexdigest()
+
+    def _geocode_request(self, location):
+        url = f"{self.base_url}/geocode/search"
+        params = {"api_key": self.api_key, "text": location}
+        return url, params
+
+    def _parse_geocode(self, data, location):
         if data.get("features"):
             return data["features"][0]["geometry"]["coordinates"]  # [lon, lat]
         raise ValueError(f"Could not geocode location: {location}")
 
-    def calculate_route(self, start, end):
+    def _route_request(self, coordinates):
         url = f"{self.base_url}/v2/directions/driving-car"
         headers = {
             "Content-Type": "application/json",
         }
         body = {
-            "coordinates": [start, end], 
+            "coordinates": list(coordinates), 
             "format": "geojson"
         }
         params = {
             "api_key": self.api_key
         }
+        return url, {"headers": headers, "json": body, "params": params}
 
-        r = requests.post(url, headers=headers, json=body, params=params)
-        r.raise_for_status()
-        data = r.json()
+    def _matrix_request(self, coordinates):
+        url = f"{self.base_url}/v2/matrix/driving-car"
+        headers = {
+            "Content-Type": "application/json",
+        }
+        body = {
+            "locations": list(coordinates),
+            "metrics": ["duration"],
+        }
+        params = {
+            "api_key": self.api_key
+        }
+        return url, {"headers": headers, "json": body, "params": params}
 
+    def _parse_matrix(self, data):
+        durations = data.get("durations")
+        if not durations:
+            raise ValueError("Unexpected matrix response format")
+        # Unroutable pairs come back as null; make them unattractive instead.
+        return [
+            [float("inf") if d is None else d for d in row] for row in durations
+        ]
+
+    def _parse_route(self, data):
         if "features" in data:
             route = data["features"][0]
             distance = route["properties"]["summary"]["distance"] / 1609.34
             duration = route["properties"]["summary"]["duration"] / 3600
             geometry = route["geometry"]
+            segments = route["properties"].get("segments", [])
 
         elif "routes" in data:
             route = data["routes"][0]
             distance = route["summary"]["distance"] / 1609.34
             duration = route["summary"]["duration"] / 3600
+            segments = route.get("segments", [])
 
             geometry = None
             if isinstance(route.get("geometry"), dict):
@@ -66,19 +196,43 @@ class RoutePlanner:
         else:
             raise ValueError("Unexpected route response format")
 
-        return {"distance": distance, "duration": duration, "geometry": geometry}
+        return {
+            "distance": distance,
+            "duration": duration,
+            "geometry": geometry,
+            # One entry per consecutive pair of waypoints.
+            "segments": [
+                {
+                    "distance": segment.get("distance", 0) / 1609.34,
+                    "duration": segment.get("duration", 0) / 3600,
+                }
+                for segment in segments
+            ],
+        }
 
-    def plan_trip_with_rest_stops(self, trip_data):
-        current_coords = self.geocode(trip_data["current_location"])
-        pickup_coords = self.geocode(trip_data["pickup_location"])
-        dropoff_coords = self.geocode(trip_data["dropoff_location"])
+    def trip_locations(self, trip_data):
+        """Ordered waypoints: current, pickup, intermediate stops, dropoff."""
+        return [
+            trip_data["current_location"],
+            trip_data["pickup_location"],
+            *trip_data.get("stops", []),
+            trip_data["dropoff_location"],
+        ]
 
-        route_result = self.calculate_route(pickup_coords, dropoff_coords)
+    def _should_optimize(self, trip_data, locations):
+        # Only the intermediate stops move, so there is nothing to reorder
+        # with fewer than two of them.
+        return trip_data.get("optimize_stops") is True and len(locations) > 4
 
+    def _build_plan(self, trip_data, locations, coords, route_result):
         distance = route_result["distance"]
         duration = route_result["duration"]
         geometry = route_result["geometry"]
 
+        # The first segment is the empty current -> pickup run.
+        segments = route_result.get("segments") or []
+        deadhead_distance = segments[0]["distance"] if segments else 0
+
         current_cycle_used = float(trip_data["current_cycle_used"])
         legs = self._calculate_eld_legs(duration, distance, current_cycle_used)
         daily_logs = self._generate_daily_logs(legs, current_cycle_used)
@@ -88,14 +242,54 @@ class RoutePlanner:
             "total_duration": round(duration, 2),
             "legs": legs,
             "daily_logs": daily_logs,
+            "deadhead_distance": round(deadhead_distance, 2),
+            "stops": locations[2:-1],
             "route_geometry": geometry,
             "markers": {
-                "current": current_coords,
-                "pickup": pickup_coords,
-                "dropoff": dropoff_coords,
+                "current": coords[0],
+                "pickup": coords[1],
+                "stops": coords[2:-1],
+                "dropoff": coords[-1],
             },
         }
 
+    # ---------------------- Stop-order Helpers ----------------------
+
+    def _optimize_stop_order(self, matrix):
+        """Order waypoints to minimise drive time using the duration matrix.
+
+        Current and pickup stay first and dropoff stays last; only the
+        intermediate stops are reordered. A nearest-neighbour tour is refined
+        with 2-opt, which is plenty for the handful of stops a load carries.
+        Returns the new order as indices into the matrix.
+        """
+        last = len(matrix) - 1
+        remaining = set(range(2, last))
+        tour = [0, 1]
+        while remaining:
+            nearest = min(remaining, key=lambda j: matrix[tour[-1]][j])
+            tour.append(nearest)
+            remaining.remove(nearest)
+        tour.append(last)
+
+        def cost(path):
+            return sum(matrix[a][b] for a, b in zip(path, path[1:]))
+
+        best_cost = cost(tour)
+        improved = True
+        while improved:
+            improved = False
+            for i in range(2, last - 1):
+                for j in range(i + 1, last):
+                    # The matrix is asymmetric, so re-cost the whole path
+                    # rather than just the two swapped edges.
+                    candidate = tour[:i] + tour[i:j + 1][::-1] + tour[j + 1:]
+                    candidate_cost = cost(candidate)
+                    if candidate_cost < best_cost:
+                        tour, best_cost = candidate, candidate_cost
+                        improved = True
+        return tour
+
     # ---------------------- ELD Helpers ----------------------
 
     def _calculate_eld_legs(self, total_duration, total_distance, current_cycle_used):
@@ -203,4 +397,167 @@ class RoutePlanner:
             "driving_hours": round(driving_hours, 2),
             "off_duty_hours": round(off_duty_hours, 2),
             "sleeper_berth_hours": round(rest_hours, 2),
-        }
\ No newline at end of file
+        }
+
+
+class AsyncRoutePlanner(RoutePlanner):
+    """Non-blocking variant of RoutePlanner for the ASGI deployment.
+
+    ORS calls go through a shared ``httpx.AsyncClient`` so a single event loop
+    can keep many plans waiting on the network at once. The request building,
+    response parsing and ELD helpers are inherited unchanged.
+    """
+
+    def __init__(self, client=None, rate_limiter=None):
+        super().__init__()
+        self._client = client
+        self.rate_limiter = rate_limiter
+
+    @property
+    def client(self):
+        # Resolved per call so one planner instance works across event loops.
+        return self._client or get_async_client()
+
+    async def _throttle(self):
+        if self.rate_limiter:
+            await self.rate_limiter.wait()
+
+    async def geocode(self, location: str):
+        key = self._geocode_cache_key(location)
+        coords = await _acache_get(key)
+        if coords is not None:
+            return coords
+
+        url, params = self._geocode_request(location)
+
+        await self._throttle()
+        r = await self.client.get(url, params=params)
+        r.raise_for_status()
+        coords = self._parse_geocode(r.json(), location)
+        await _acache_set(key, coords, settings.ORS_GEOCODE_CACHE_TTL)
+        return coords
+
+    async def calculate_route(self, coordinates):
+        key = self._route_cache_key(coordinates)
+        route = await _acache_get(key)
+        if route is not None:
+            return route
+
+        url, kwargs = self._route_request(coordinates)
+
+        await self._throttle()
+        r = await self.client.post(url, **kwargs)
+        r.raise_for_status()
+        route = self._parse_route(r.json())
+        await _acache_set(key, route, settings.ORS_ROUTE_CACHE_TTL)
+        return route
+
+    async def duration_matrix(self, coordinates):
+        url, kwargs = self._matrix_request(coordinates)
+
+        await self._throttle()
+        r = await self.client.post(url, **kwargs)
+        r.raise_for_status()
+        return self._parse_matrix(r.json())
+
+    async def plan_trip_with_rest_stops(self, trip_data):
+        locations = self.trip_locations(trip_data)
+        # The lookups are independent, so issue them concurrently.
+        coords = list(
+            await asyncio.gather(*(self.geocode(location) for location in locations))
+        )
+
+        if self._should_optimize(trip_data, locations):
+            order = self._optimize_stop_order(await self.duration_matrix(coords))
+            locations = [locations[i] for i in order]
+            coords = [coords[i] for i in order]
+
+        route_result = await self.calculate_route(coords)
+
+        return self._build_plan(trip_data, locations, coords, route_result)
+
+
+# ---------------------- Shared clients ----------------------
+# Everything below is created on first use rather than at import time. That
+# keeps cold starts cheap, and a preloading master process (see
+# eld_backend/factory.py) never opens sockets its forked workers would share.
+
+ASYNC_HTTP_TIMEOUT = {"timeout": 30.0, "connect": 5.0}
+ASYNC_HTTP_LIMITS = {"max_connections": 200, "max_keepalive_connections": 50}
+
+_http_session = None
+_async_client = None
+_async_client_loop = None
+
+
+@functools.lru_cache(maxsize=None)
+def get_route_planner():
+    """Process-wide RoutePlanner; it holds no per-request state."""
+    return RoutePlanner()
+
+
+@functools.lru_cache(maxsize=None)
+def get_async_route_planner():
+    """Process-wide AsyncRoutePlanner; it holds no per-request state."""
+    return AsyncRoutePlanner()
+
+
+def get_http_session():
+    """Return the process-wide requests.Session, creating it on first use."""
+    global _http_session
+
+    if _http_session is None:
+        import requests
+
+        _http_session = requests.Session()
+    return _http_session
+
+
+def new_async_client():
+    """Return a new AsyncClient; the caller is responsible for closing it."""
+    import httpx
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(**ASYNC_HTTP_TIMEOUT),
+        limits=httpx.Limits(**ASYNC_HTTP_LIMITS),
+    )
+
+
+def get_async_client():
+    """Return the process-wide AsyncClient, creating it for the running loop.
+
+    Only for long-lived event loops such as an ASGI worker's or a management
+    command's. An AsyncClient's connection pool is tied to the loop it was
+    first used on, so a new client is created if the loop has changed, and
+    the old one can no longer be closed cleanly. Code that runs in a
+    throwaway loop should use ``new_async_client()`` and close it instead.
+    """
+    global _async_client, _async_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        _async_client = new_async_client()
+        _async_client_loop = loop
+    return _async_client
+
+
+class RateLimiter:
+    """Spaces out ORS requests to at most ``rate`` per second.
+
+    Cache hits never reach the limiter, only real upstream calls do.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
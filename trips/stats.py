@@ -0,0 +1,155 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import DailyFleetStats, LaneStats, DriverStats
+
+COUNTERS = ("trip_count", "total_miles", "driving_hours", "total_duration")
+ARCHIVED = {name: f"archived_{name}" for name in COUNTERS}
+
+
+# Every writer locks aggregate rows in this model order (and, when it touches
+# several rows of one model, in key order) so concurrent writers can't
+# deadlock. stats_keys returns rows in this order.
+LOCK_ORDER = (DailyFleetStats, LaneStats, DriverStats)
+
+
+# Fields identifying an aggregate row, as used in stats_keys lookups.
+KEY_FIELDS = {
+    DailyFleetStats: ("date",),
+    LaneStats: ("pickup_location", "dropoff_location"),
+    DriverStats: ("user_id",),
+}
+
+
+def stats_keys(trip_date, pickup_location, dropoff_location, user_id):
+    """Aggregate rows a trip contributes to, as (model, lookup) pairs."""
+    return [
+        (DailyFleetStats, {"date": trip_date}),
+        (
+            LaneStats,
+            {"pickup_location": pickup_location, "dropoff_location": dropoff_location},
+        ),
+        (DriverStats, {"user_id": user_id}),
+    ]
+
+
+def contribution(total_distance, estimated_duration, driving_hours, deadhead_distance=None):
+    """Counter deltas for one trip, treating missing values as zero.
+
+    ``lane_miles`` is what the trip adds to its lane's ``total_miles``: the
+    loaded run from pickup to dropoff, via any stops, without the deadhead.
+    Days and drivers count every mile driven.
+    """
+    total_miles = total_distance or Decimal("0")
+    return {
+        "trip_count": 1,
+        "total_miles": total_miles,
+        "lane_miles": total_miles - (deadhead_distance or Decimal("0")),
+        "driving_hours": driving_hours or Decimal("0"),
+        "total_duration": estimated_duration or Decimal("0"),
+    }
+
+
+def row_deltas(model, deltas):
+    """The COUNTERS deltas a contribution makes to one row of ``model``."""
+    counters = {name: deltas[name] for name in COUNTERS}
+    if model is LaneStats:
+        counters["total_miles"] = deltas["lane_miles"]
+    return counters
+
+
+def new_totals():
+    """Batched counter totals, keyed by aggregate row; see add_to_totals."""
+    return defaultdict(lambda: dict.fromkeys(COUNTERS, Decimal("0")))
+
+
+def add_to_totals(totals, keys, deltas):
+    """Add one trip's deltas to every aggregate row it contributes to."""
+    for model, lookup in keys:
+        counters = totals[(model, tuple(sorted(lookup.items())))]
+        for name, delta in row_deltas(model, deltas).items():
+            counters[name] += delta
+
+
+def archive_totals(totals):
+    """Mark a batch of trips' contributions as archived.
+
+    The totals themselves are unchanged, so the dashboards keep the history
+    of archived trips. The archived_* counters record how much of each total
+    no longer has Trip rows behind it, which rebuild_stats adds back.
+
+    Call as the last step of the transaction that deletes the trips, so the
+    rows plan_trip also updates are locked only briefly. Rows are updated in
+    LOCK_ORDER, then by key, matching _apply.
+    """
+    ordered = sorted(
+        totals.items(),
+        key=lambda item: (LOCK_ORDER.index(item[0][0]), item[0][1]),
+    )
+    for (model, lookup), counters in ordered:
+        model.objects.filter(**dict(lookup)).update(
+            **{ARCHIVED[name]: F(ARCHIVED[name]) + counters[name] for name in COUNTERS}
+        )
+
+
+def archived_totals():
+    """The archived_* counters of every row that has any, keyed as in new_totals."""
+    totals = {}
+    for model in LOCK_ORDER:
+        key_fields = KEY_FIELDS[model]
+        rows = model.objects.exclude(archived_trip_count=0).values(
+            *key_fields, *ARCHIVED.values()
+        )
+        for row in rows:
+            key = (model, tuple(sorted((field, row[field]) for field in key_fields)))
+            totals[key] = {name: row[ARCHIVED[name]] for name in COUNTERS}
+    return totals
+
+
+def trip_contribution(trip, driving_hours=None):
+    """Counter deltas for a Trip instance.
+
+    ``driving_hours`` can be passed when the caller already has the daily logs
+    in hand; otherwise it is summed from the database.
+    """
+    if driving_hours is None:
+        driving_hours = trip.daily_logs.aggregate(total=Sum("driving_hours"))["total"]
+    return contribution(
+        trip.total_distance,
+        trip.estimated_duration,
+        driving_hours,
+        trip.deadhead_distance,
+    )
+
+
+def _apply(trip, contribution, sign):
+    keys = stats_keys(
+        timezone.localdate(trip.created_at),
+        trip.pickup_location,
+        trip.dropoff_location,
+        trip.user_id,
+    )
+    with transaction.atomic():
+        for model, lookup in keys:
+            model.objects.get_or_create(**lookup)
+            # F() increments so concurrent plans never overwrite each other.
+            model.objects.filter(**lookup).update(
+                **{
+                    name: F(name) + sign * delta
+                    for name, delta in row_deltas(model, contribution).items()
+                }
+            )
+
+
+def record_trip(trip, driving_hours=None):
+    """Add a newly planned trip to the aggregates."""
+    _apply(trip, trip_contribution(trip, driving_hours), 1)
+
+
+def forget_trip(trip, driving_hours=None):
+    """Remove a trip from the aggregates before it is deleted or replanned."""
+    _apply(trip, trip_contribution(trip, driving_hours), -1)
@@ -1,3 +1,760 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import itertools
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import services
+from .checks import ors_api_key_check
+from .management.commands.profile_startup import Command as ProfileStartupCommand
+from .models import Trip, TripLeg, DailyLog, DailyFleetStats, LaneStats, DriverStats
+from .services import (
+    RateLimiter,
+    RoutePlanner,
+    get_async_route_planner,
+    get_route_planner,
+)
+from .views import _invalid_optimize_stops, _invalid_stops
+
+METERS_PER_MILE = 1609.34
+
+# Test locations sit on a line; each unit of longitude is 100 miles / 2 hours.
+LOCATIONS = {
+    "Chicago": 0,
+    "Gary": 1,
+    "Toledo": 3,
+    "Cleveland": 4,
+    "Pittsburgh": 6,
+    "Philadelphia": 9,
+}
+
+
+def ors_handler(request, calls):
+    """Fake OpenRouteService: geocode, directions and matrix endpoints."""
+    calls.append(request.url.path)
+    if request.url.path.endswith("/geocode/search"):
+        text = request.url.params["text"]
+        if text not in LOCATIONS:
+            return httpx.Response(200, json={"features": []}, request=request)
+        feature = {"geometry": {"coordinates": [LOCATIONS[text], 0]}}
+        return httpx.Response(200, json={"features": [feature]}, request=request)
+
+    body = json.loads(request.content)
+    if request.url.path.endswith("/matrix/driving-car"):
+        points = body["locations"]
+        durations = [[abs(a[0] - b[0]) * 7200 for b in points] for a in points]
+        return httpx.Response(200, json={"durations": durations}, request=request)
+
+    points = body["coordinates"]
+    segments = [
+        {
+            "distance": abs(a[0] - b[0]) * 100 * METERS_PER_MILE,
+            "duration": abs(a[0] - b[0]) * 7200,
+        }
+        for a, b in zip(points, points[1:])
+    ]
+    feature = {
+        "properties": {
+            "summary": {
+                "distance": sum(s["distance"] for s in segments),
+                "duration": sum(s["duration"] for s in segments),
+            },
+            "segments": segments,
+        },
+        "geometry": {"type": "LineString", "coordinates": points},
+    }
+    return httpx.Response(200, json={"features": [feature]}, request=request)
+
+
+class FakeSession:
+    """Stands in for requests.Session, answering from ors_handler."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def get(self, url, params=None):
+        return ors_handler(httpx.Request("GET", url, params=params), self.calls)
+
+    def post(self, url, headers=None, json=None, params=None):
+        request = httpx.Request("POST", url, params=params, json=json)
+        return ors_handler(request, self.calls)
+
+
+class ORSTestCase(TestCase):
+    """Routes every ORS call, sync or async, to ors_handler."""
+
+    def setUp(self):
+        cache.clear()
+        get_route_planner.cache_clear()
+        get_async_route_planner.cache_clear()
+        self.addCleanup(get_route_planner.cache_clear)
+        self.addCleanup(get_async_route_planner.cache_clear)
+
+        self.ors_calls = []
+        self.async_clients = []
+        for patcher in (
+            mock.patch.dict(os.environ, {"ORS_API_KEY": "test-key"}),
+            mock.patch(
+                "trips.services.get_http_session",
+                return_value=FakeSession(self.ors_calls),
+            ),
+            mock.patch("trips.views.new_async_client", side_effect=self.new_async_client),
+            mock.patch("trips.services.new_async_client", side_effect=self.new_async_client),
+            mock.patch.object(services, "_async_client", None),
+            mock.patch.object(services, "_async_client_loop", None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def new_async_client(self):
+        transport = httpx.MockTransport(lambda r: ors_handler(r, self.ors_calls))
+        client = httpx.AsyncClient(transport=transport)
+        self.async_clients.append(client)
+        return client
+
+    def plan(self, path="/api/trips/plan_trip/", **fields):
+        data = {
+            "current_location": "Chicago",
+            "pickup_location": "Gary",
+            "dropoff_location": "Philadelphia",
+            "current_cycle_used": 10,
+            **fields,
+        }
+        return self.client.post(path, data=data, content_type="application/json")
+
+
+class AsyncPlanTripTests(ORSTestCase):
+    def test_wsgi_requests_close_their_client(self):
+        for _ in range(3):
+            response = self.plan("/api/trips/plan_trip_async/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["total_distance"], 900.0)
+
+        self.assertEqual(len(self.async_clients), 3)
+        self.assertTrue(all(client.is_closed for client in self.async_clients))
+        self.assertIsNone(services._async_client)
+
+    async def test_asgi_requests_share_one_pooled_client(self):
+        pickups = ["Gary", "Toledo", "Cleveland", "Pittsburgh", "Gary"]
+        responses = await asyncio.gather(
+            *(
+                self.async_client.post(
+                    "/api/trips/plan_trip_async/",
+                    data={
+                        "current_location": "Chicago",
+                        "pickup_location": pickup,
+                        "dropoff_location": "Philadelphia",
+                        "current_cycle_used": 10,
+                    },
+                    content_type="application/json",
+                )
+                for pickup in pickups
+            )
+        )
+
+        self.assertEqual([r.status_code for r in responses], [200] * len(pickups))
+        self.assertEqual([r.json()["total_distance"] for r in responses], [900.0] * len(pickups))
+        self.assertEqual(len(self.async_clients), 1)
+        self.assertIs(services._async_client, self.async_clients[0])
+        self.assertFalse(services._async_client.is_closed)
+        await services._async_client.aclose()
+
+    def test_failed_save_rolls_back_trip_and_stats(self):
+        with mock.patch("trips.views.record_trip", side_effect=RuntimeError("boom")), \
+                mock.patch("trips.views.traceback.print_exc"):
+            response = self.plan("/api/trips/plan_trip_async/")
+
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(Trip.objects.exists())
+        self.assertFalse(TripLeg.objects.exists())
+        self.assertFalse(DailyLog.objects.exists())
+        self.assertFalse(DailyFleetStats.objects.exists())
+
+
+# Nothing listens on port 1, so every cache call fails to connect.
+UNREACHABLE_REDIS = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://127.0.0.1:1/0",
+    }
+}
+
+
+class CacheOutageTests(ORSTestCase):
+    def setUp(self):
+        super().setUp()
+        outage = override_settings(CACHES=UNREACHABLE_REDIS)
+        outage.enable()
+        self.addCleanup(outage.disable)
+
+    def test_plans_fall_through_to_ors(self):
+        for path in ("/api/trips/plan_trip/", "/api/trips/plan_trip_async/"):
+            with self.assertLogs("trips.services", "WARNING"):
+                response = self.plan(path)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(response.json()["total_distance"], 900.0)
+
+
+STATS_FIELDS = ["trip_count", "total_miles", "driving_hours", "total_duration"]
+
+
+def stats_snapshot():
+    """Non-empty aggregate rows, as served by the stats endpoints."""
+    return {
+        "daily": list(
+            DailyFleetStats.objects.filter(trip_count__gt=0)
+            .order_by("date")
+            .values("date", *STATS_FIELDS)
+        ),
+        "lanes": list(
+            LaneStats.objects.filter(trip_count__gt=0)
+            .order_by("pickup_location", "dropoff_location")
+            .values("pickup_location", "dropoff_location", *STATS_FIELDS)
+        ),
+        "drivers": list(
+            DriverStats.objects.filter(trip_count__gt=0)
+            .order_by("user_id")
+            .values("user_id", *STATS_FIELDS)
+        ),
+    }
+
+
+class StatsTests(ORSTestCase):
+    def lane(self, pickup="Gary", dropoff="Philadelphia"):
+        return LaneStats.objects.get(pickup_location=pickup, dropoff_location=dropoff)
+
+    def test_plan_update_and_delete_keep_stats_in_step(self):
+        first = self.plan().json()
+        self.plan("/api/trips/plan_trip_async/")
+        self.plan(pickup_location="Toledo")
+
+        lane = self.lane()
+        self.assertEqual(lane.trip_count, 2)
+        # Lanes leave out the 100-mile Chicago -> Gary deadhead.
+        self.assertEqual(lane.total_miles, 1600)
+        self.assertEqual(lane.total_duration, 36)
+        self.assertEqual(DailyFleetStats.objects.get().trip_count, 3)
+        self.assertEqual(DriverStats.objects.get().total_miles, 1800 + 900)
+
+        response = self.client.patch(
+            f"/api/trips/{first['id']}/",
+            data={"total_distance": 500},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.lane().total_miles, 400 + 800)
+        self.assertEqual(self.lane().trip_count, 2)
+
+        response = self.client.delete(f"/api/trips/{first['id']}/")
+        self.assertEqual(response.status_code, 204)
+        lane = self.lane()
+        self.assertEqual(lane.trip_count, 1)
+        self.assertEqual(lane.total_miles, 800)
+        self.assertEqual(DailyFleetStats.objects.get().trip_count, 2)
+
+        response = self.client.get("/api/stats/lanes/?limit=1")
+        self.assertEqual(
+            [(row["pickup_location"], row["trip_count"]) for row in response.json()],
+            [("Gary", 1)],
+        )
+
+    def test_bad_query_params_are_rejected(self):
+        for url in (
+            "/api/stats/daily/?start=yesterday",
+            "/api/stats/daily/?start=2026-13-01",
+            "/api/stats/daily/?end=2026-02-30",
+            "/api/stats/lanes/?limit=0",
+            "/api/stats/lanes/?limit=-3",
+            "/api/stats/lanes/?limit=%C2%B2",
+            "/api/stats/drivers/?limit=ten",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 400)
+
+        self.assertEqual(self.client.get("/api/stats/daily/?start=2026-02-28").status_code, 200)
+        self.assertEqual(self.client.get("/api/stats/lanes/?limit=5").status_code, 200)
+
+    def test_rebuild_matches_incremental_totals(self):
+        self.plan()
+        self.plan(stops=["Cleveland"])
+        self.plan(pickup_location="Toledo", dropoff_location="Pittsburgh")
+        incremental = stats_snapshot()
+
+        call_command("rebuild_stats", chunk_size=1, stdout=io.StringIO())
+
+        self.assertEqual(stats_snapshot(), incremental)
+        self.assertEqual(len(incremental["lanes"]), 2)
+
+
+class ArchiveTripsTests(ORSTestCase):
+    def setUp(self):
+        super().setUp()
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def plan_aged(self, days_ago, **fields):
+        trip_id = self.plan(**fields).json()["id"]
+        Trip.objects.filter(pk=trip_id).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return trip_id
+
+    def archive(self, **options):
+        call_command(
+            "archive_trips",
+            older_than_days=30,
+            output_dir=self.output_dir,
+            sleep=0,
+            stdout=io.StringIO(),
+            **options,
+        )
+
+    def test_bad_cutoff_is_a_command_error(self):
+        for before in ("last-year", "2026-02-30", "2026-13-01"):
+            with self.subTest(before=before):
+                with self.assertRaisesMessage(
+                    CommandError, "--before must be a date in YYYY-MM-DD format"
+                ):
+                    call_command("archive_trips", before=before, output_dir=self.output_dir)
+
+    def test_archived_trips_stay_in_the_stats_through_a_rebuild(self):
+        self.plan_aged(60)
+        self.plan_aged(60, pickup_location="Toledo")
+        self.plan_aged(1)
+        # Stats were recorded under the planning date; re-key them by the
+        # backdated created_at so they match what rebuild_stats derives.
+        call_command("rebuild_stats", stdout=io.StringIO())
+        before = stats_snapshot()
+
+        self.archive(batch_size=1)
+
+        self.assertEqual(Trip.objects.count(), 1)
+        self.assertEqual(stats_snapshot(), before)
+        call_command("rebuild_stats", stdout=io.StringIO())
+        self.assertEqual(stats_snapshot(), before)
+
+        self.assertEqual(before["drivers"][0]["trip_count"], 3)
+        self.assertEqual(len(before["daily"]), 2)
+        lane = LaneStats.objects.get(pickup_location="Gary")
+        self.assertEqual((lane.trip_count, lane.archived_trip_count), (2, 1))
+        self.assertEqual((lane.total_miles, lane.archived_total_miles), (1600, 800))
+        self.assertEqual(DriverStats.objects.get().archived_trip_count, 2)
+
+        response = self.client.get("/api/stats/lanes/")
+        self.assertNotIn("archived_trip_count", response.json()[0])
+
+    def test_stats_rows_are_locked_last_and_in_lock_order(self):
+        self.plan_aged(60, pickup_location="Toledo")
+        self.plan_aged(60)
+        self.plan_aged(60, pickup_location="Cleveland")
+        call_command("rebuild_stats", stdout=io.StringIO())
+
+        with CaptureQueriesContext(connection) as queries:
+            self.archive(batch_size=3)
+
+        writes = [
+            q["sql"] for q in queries.captured_queries
+            if q["sql"].startswith(("DELETE", "UPDATE"))
+        ]
+        tables = [
+            next(t for t in ("dailylog", "tripleg", "trip", "dailyfleetstats",
+                             "lanestats", "driverstats")
+                 if f'"trips_{t}"' in sql)
+            for sql in writes
+        ]
+        self.assertEqual(
+            tables,
+            ["dailylog", "tripleg", "trip", "dailyfleetstats",
+             "lanestats", "lanestats", "lanestats", "driverstats"],
+        )
+        lane_updates = [sql for sql in writes if '"trips_lanestats"' in sql]
+        pickups = [
+            next(p for p in ("Cleveland", "Gary", "Toledo") if f"'{p}'" in sql)
+            for sql in lane_updates
+        ]
+        self.assertEqual(pickups, sorted(pickups))
+
+    def archived_trips(self):
+        trips = []
+        for path in sorted(Path(self.output_dir).glob("*.ndjson.gz")):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                trips.extend(json.loads(line) for line in f)
+        return trips
+
+    def test_archive_contents_and_raw_delete(self):
+        old = [self.plan_aged(60, stops=["Cleveland"]), self.plan_aged(45)]
+        recent = self.plan_aged(1)
+
+        self.archive(batch_size=1)
+
+        archived = self.archived_trips()
+        self.assertEqual([trip["id"] for trip in archived], old)
+        first = archived[0]
+        self.assertEqual(first["stops"], ["Cleveland"])
+        self.assertEqual(
+            [leg["sequence"] for leg in first["legs"]],
+            sorted(leg["sequence"] for leg in first["legs"]),
+        )
+        self.assertTrue(first["legs"])
+        self.assertTrue(first["daily_logs"])
+
+        self.assertEqual(list(Trip.objects.values_list("id", flat=True)), [recent])
+        self.assertFalse(TripLeg.objects.exclude(trip_id=recent).exists())
+        self.assertFalse(DailyLog.objects.exclude(trip_id=recent).exists())
+
+    def test_rerun_with_new_batch_size_does_not_duplicate(self):
+        old = [self.plan_aged(60) for _ in range(4)]
+
+        # Interrupted after writing the first batch but before deleting it.
+        with mock.patch(
+            "trips.management.commands.archive_trips.Command._delete_batch",
+            side_effect=RuntimeError("interrupted"),
+        ), self.assertRaises(RuntimeError):
+            self.archive(batch_size=2)
+        self.assertEqual(len(self.archived_trips()), 2)
+
+        self.archive(batch_size=3)
+
+        self.assertEqual(sorted(trip["id"] for trip in self.archived_trips()), old)
+        self.assertFalse(Trip.objects.exists())
+
+
+INF = float("inf")
+
+
+def tour_cost(matrix, tour):
+    return sum(matrix[a][b] for a, b in zip(tour, tour[1:]))
+
+
+def best_cost(matrix):
+    """Brute-force optimum with current/pickup first and dropoff last."""
+    last = len(matrix) - 1
+    return min(
+        tour_cost(matrix, [0, 1, *middle, last])
+        for middle in itertools.permutations(range(2, last))
+    )
+
+
+class StopOrderTests(ORSTestCase):
+    def setUp(self):
+        super().setUp()
+        self.planner = RoutePlanner()
+
+    def assert_valid_tour(self, matrix, tour):
+        last = len(matrix) - 1
+        self.assertEqual(tour[:2], [0, 1])
+        self.assertEqual(tour[-1], last)
+        self.assertEqual(sorted(tour[2:-1]), list(range(2, last)))
+
+    def test_asymmetric_matrix(self):
+        # Going "forward" (to a higher index) is cheap, going back is dear,
+        # except from the pickup, which is nearest to stop 4.
+        matrix = [
+            [0, 1, 9, 9, 9, 9],
+            [9, 0, 5, 6, 1, 9],
+            [9, 9, 0, 1, 9, 2],
+            [9, 9, 9, 0, 9, 1],
+            [9, 9, 1, 9, 0, 9],
+            [9, 9, 9, 9, 9, 0],
+        ]
+        tour = self.planner._optimize_stop_order(matrix)
+
+        self.assert_valid_tour(matrix, tour)
+        self.assertEqual(tour, [0, 1, 4, 2, 3, 5])
+        self.assertEqual(tour_cost(matrix, tour), best_cost(matrix))
+
+    def test_unroutable_pairs_are_avoided(self):
+        matrix = [
+            [0, 1, 1, 1, 1, 1],
+            [1, 0, 1, 2, INF, 9],
+            [1, INF, 0, 1, 3, 9],
+            [1, 1, INF, 0, 1, 9],
+            [1, 1, 1, INF, 0, 1],
+            [1, 1, 1, 1, 1, 0],
+        ]
+        tour = self.planner._optimize_stop_order(matrix)
+
+        self.assert_valid_tour(matrix, tour)
+        self.assertEqual(tour_cost(matrix, tour), best_cost(matrix))
+        self.assertLess(tour_cost(matrix, tour), INF)
+
+    def test_all_unroutable_still_returns_every_stop(self):
+        matrix = [[0 if i == j else INF for j in range(5)] for i in range(5)]
+        self.assert_valid_tour(matrix, self.planner._optimize_stop_order(matrix))
+
+    def test_plan_optimizes_only_intermediate_stops(self):
+        response = self.plan(
+            stops=["Pittsburgh", "Toledo", "Cleveland"], optimize_stops=True
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        trip = response.json()
+
+        self.assertEqual(trip["stops"], ["Toledo", "Cleveland", "Pittsburgh"])
+        self.assertEqual(trip["markers"]["current"], [0, 0])
+        self.assertEqual(trip["markers"]["pickup"], [1, 0])
+        self.assertEqual(trip["markers"]["dropoff"], [9, 0])
+        # Chicago -> Gary -> Toledo -> Cleveland -> Pittsburgh -> Philadelphia
+        self.assertEqual(trip["total_distance"], 900.0)
+        self.assertEqual(self.ors_calls.count("/v2/matrix/driving-car"), 1)
+        self.assertEqual(self.ors_calls.count("/v2/directions/driving-car"), 1)
+
+    def test_stops_keep_their_order_without_optimize(self):
+        trip = self.plan(stops=["Pittsburgh", "Toledo"]).json()
+
+        self.assertEqual(trip["stops"], ["Pittsburgh", "Toledo"])
+        self.assertNotIn("/v2/matrix/driving-car", self.ors_calls)
+
+
+class DeadheadTests(ORSTestCase):
+    def test_deadhead_is_the_first_segment(self):
+        planner = RoutePlanner()
+        route = planner.calculate_route([[0, 0], [1, 0], [9, 0]])
+        self.assertAlmostEqual(route["segments"][0]["distance"], 100.0)
+
+        trip = self.plan(stops=["Cleveland"]).json()
+
+        # Chicago -> Gary is the empty run before pickup.
+        self.assertEqual(trip["deadhead_distance"], 100.0)
+        self.assertEqual(trip["total_distance"], 900.0)
+        # ...and its 2 hours are part of the driving legs.
+        driving = sum(
+            leg["duration"]
+            for leg in trip["legs"]
+            if not leg["rest_stop"] and not leg["fueling_stop"]
+        )
+        self.assertAlmostEqual(driving, 18.0)
+
+    def test_deadhead_is_zero_without_segments(self):
+        plan = RoutePlanner()._build_plan(
+            {"current_cycle_used": 0},
+            ["Chicago", "Gary", "Philadelphia"],
+            [[0, 0], [1, 0], [9, 0]],
+            {"distance": 800, "duration": 16, "geometry": None},
+        )
+        self.assertEqual(plan["deadhead_distance"], 0)
+
+
+class WarmCachesTests(ORSTestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create(username="warm")
+        # Location counts: Chicago 5, Gary 4, Philadelphia 4, Toledo 2,
+        # Cleveland 2, Pittsburgh 1. Lanes: 3, 2 and 1 trips.
+        for count, (current, pickup, dropoff) in (
+            (3, ("Chicago", "Gary", "Philadelphia")),
+            (2, ("Chicago", "Toledo", "Cleveland")),
+            (1, ("Gary", "Pittsburgh", "Philadelphia")),
+        ):
+            for _ in range(count):
+                Trip.objects.create(
+                    user=user,
+                    current_location=current,
+                    pickup_location=pickup,
+                    dropoff_location=dropoff,
+                    current_cycle_used=0,
+                )
+
+    def warm(self, **options):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command("warm_caches", rate=1000, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def geocoded(self, location):
+        return cache.get(RoutePlanner()._geocode_cache_key(location)) is not None
+
+    def routed(self, *locations):
+        coords = [[LOCATIONS[location], 0] for location in locations]
+        return cache.get(RoutePlanner()._route_cache_key(coords)) is not None
+
+    def test_most_frequent_entries_are_warmed_up_to_the_limits(self):
+        stdout, _ = self.warm(locations=3, lanes=1)
+
+        for location in ("Chicago", "Gary", "Philadelphia"):
+            self.assertTrue(self.geocoded(location), location)
+        for location in ("Toledo", "Cleveland", "Pittsburgh"):
+            self.assertFalse(self.geocoded(location), location)
+        self.assertTrue(self.routed("Chicago", "Gary", "Philadelphia"))
+        self.assertFalse(self.routed("Chicago", "Toledo", "Cleveland"))
+        self.assertEqual(len(self.ors_calls), 4)
+
+        self.assertIn("Geocoded 3/3 locations, covering 72.2% of location lookups", stdout)
+        self.assertIn("Routed 1/1 lanes, covering 50.0% of trips", stdout)
+
+    def test_cached_entries_are_not_fetched_again(self):
+        self.warm(locations=3, lanes=1)
+        self.ors_calls.clear()
+
+        self.warm()
+
+        # Only the three uncached locations and the two uncached lanes.
+        self.assertEqual(
+            sorted(self.ors_calls),
+            ["/geocode/search"] * 3 + ["/v2/directions/driving-car"] * 2,
+        )
+        self.ors_calls.clear()
+        self.warm()
+        self.assertEqual(self.ors_calls, [])
+
+    def test_warmed_plans_make_no_ors_calls(self):
+        self.warm()
+        self.ors_calls.clear()
+
+        response = self.plan()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total_distance"], 900.0)
+        self.assertEqual(self.ors_calls, [])
+
+    def test_failures_are_reported_and_excluded_from_coverage(self):
+        Trip.objects.create(
+            user=User.objects.get(username="warm"),
+            current_location="Chicago",
+            pickup_location="Gary",
+            dropoff_location="Atlantis",
+            current_cycle_used=0,
+        )
+
+        stdout, stderr = self.warm()
+
+        # 21 lookups in 7 trips; Atlantis is 1 of them, its lane 1 trip.
+        self.assertIn("Geocoded 6/7 locations, covering 95.2% of location lookups", stdout)
+        self.assertIn("Routed 3/4 lanes, covering 85.7% of trips", stdout)
+        self.assertIn(
+            "geocode failed for 'Atlantis': Could not geocode location: Atlantis", stderr
+        )
+        self.assertIn("route failed for 'Gary' -> 'Atlantis'", stderr)
+
+
+class RateLimiterTests(TestCase):
+    def test_calls_are_spaced_by_the_interval(self):
+        delays = []
+
+        async def sleep(delay):
+            delays.append(delay)
+
+        async def run():
+            limiter = RateLimiter(rate=10)
+            with mock.patch("trips.services.asyncio.sleep", side_effect=sleep):
+                await asyncio.gather(*(limiter.wait() for _ in range(4)))
+
+        asyncio.run(run())
+
+        # The first call goes straight through; each later one waits a slot.
+        self.assertEqual(len(delays), 3)
+        for delay, expected in zip(delays, (0.1, 0.2, 0.3)):
+            self.assertAlmostEqual(delay, expected, places=2)
+
+    def test_idle_limiter_does_not_wait(self):
+        async def run():
+            limiter = RateLimiter(rate=1000)
+            await limiter.wait()
+            await asyncio.sleep(0.01)
+            with mock.patch("trips.services.asyncio.sleep") as sleep:
+                await limiter.wait()
+            return sleep
+
+        self.assertFalse(asyncio.run(run()).called)
+
+
+class InvalidStopsTests(ORSTestCase):
+    def test_valid_stops(self):
+        self.assertIsNone(_invalid_stops({}))
+        self.assertIsNone(_invalid_stops({"stops": []}))
+        self.assertIsNone(_invalid_stops({"stops": ["Toledo", "Cleveland"]}))
+
+    def test_invalid_stops(self):
+        for stops in ("Toledo", {"a": 1}, None, [1], ["Toledo", ""], ["  "], [None]):
+            with self.subTest(stops=stops):
+                self.assertEqual(
+                    _invalid_stops({"stops": stops}),
+                    "stops must be a list of location names",
+                )
+
+    def test_too_many_stops(self):
+        stops = ["Toledo"] * (RoutePlanner.MAX_STOPS + 1)
+        self.assertEqual(
+            _invalid_stops({"stops": stops}),
+            f"At most {RoutePlanner.MAX_STOPS} stops are supported",
+        )
+        self.assertIsNone(_invalid_stops({"stops": stops[:-1]}))
+
+    def test_endpoints_reject_invalid_stops(self):
+        for path in ("/api/trips/plan_trip/", "/api/trips/plan_trip_async/"):
+            response = self.plan(path, stops="Toledo")
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(
+                response.json(), {"error": "stops must be a list of location names"}
+            )
+        self.assertEqual(self.ors_calls, [])
+
+    def test_optimize_stops_must_be_a_boolean(self):
+        for value in (True, False):
+            self.assertIsNone(_invalid_optimize_stops({"optimize_stops": value}))
+        self.assertIsNone(_invalid_optimize_stops({}))
+        for value in ("false", "0", 0, 1, None, []):
+            with self.subTest(value=value):
+                self.assertEqual(
+                    _invalid_optimize_stops({"optimize_stops": value}),
+                    "optimize_stops must be true or false",
+                )
+
+    def test_endpoints_reject_non_boolean_optimize_stops(self):
+        for path in ("/api/trips/plan_trip/", "/api/trips/plan_trip_async/"):
+            response = self.plan(path, stops=["Toledo", "Cleveland"], optimize_stops="false")
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(
+                response.json(), {"error": "optimize_stops must be true or false"}
+            )
+        self.assertEqual(self.ors_calls, [])
+
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       412 |        412 |   _io
+import time:      1520 |       1520 |     django.utils.version
+import time:      2031 |       3551 |   django
+some other stderr line
+import time:       350 |       3901 | eld_backend.wsgi
+"""
+
+
+class ProfileStartupTests(TestCase):
+    def test_parse_importtime_output(self):
+        self.assertEqual(
+            ProfileStartupCommand()._parse(IMPORTTIME_OUTPUT),
+            [
+                ("_io", 412, 412),
+                ("django.utils.version", 1520, 1520),
+                ("django", 2031, 3551),
+                ("eld_backend.wsgi", 350, 3901),
+            ],
+        )
+
+    def test_parse_header_only(self):
+        self.assertEqual(ProfileStartupCommand()._parse(IMPORTTIME_OUTPUT.splitlines()[0]), [])
+
+
+class ChecksTests(TestCase):
+    @override_settings(ORS_API_KEY="")
+    def test_missing_ors_api_key_warns(self):
+        errors = ors_api_key_check(None)
+        self.assertEqual([error.id for error in errors], ["trips.W001"])
+
+    @override_settings(ORS_API_KEY="test-key")
+    def test_ors_api_key_set(self):
+        self.assertEqual(ors_api_key_check(None), [])
@@ -1,10 +1,21 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TripViewSet
+from .views import (
+    TripViewSet,
+    DailyFleetStatsViewSet,
+    LaneStatsViewSet,
+    DriverStatsViewSet,
+    plan_trip_async,
+)
 
 router = DefaultRouter()
 router.register(r'trips', TripViewSet)
+router.register(r'stats/daily', DailyFleetStatsViewSet)
+router.register(r'stats/lanes', LaneStatsViewSet)
+router.register(r'stats/drivers', DriverStatsViewSet)
 
 urlpatterns = [
+    # Must precede the router, whose detail route would otherwise match it.
+    path('trips/plan_trip_async/', plan_trip_async, name='trip-plan-trip-async'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
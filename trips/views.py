@@ -1,43 +1,193 @@
 from rest_framework import viewsets, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from .models import Trip, TripLeg, DailyLog
-from .serializers import TripSerializer
-from .services import RoutePlanner
+from .models import Trip, TripLeg, DailyLog, DailyFleetStats, LaneStats, DriverStats
+from .serializers import (
+    TripSerializer,
+    DailyFleetStatsSerializer,
+    LaneStatsSerializer,
+    DriverStatsSerializer,
+)
+from .services import (
+    RoutePlanner,
+    AsyncRoutePlanner,
+    get_route_planner,
+    get_async_route_planner,
+    new_async_client,
+)
+from .stats import record_trip, forget_trip
+import json
 import traceback
 from datetime import datetime
 from decimal import Decimal
 
 
+REQUIRED_FIELDS = [
+    "current_location",
+    "pickup_location",
+    "dropoff_location",
+    "current_cycle_used",
+]
+
+DEFAULT_USER_KWARGS = {
+    "username": "default_user",
+    "defaults": {
+        "email": "default@example.com",
+        "password": "defaultpassword123",
+    },
+}
+
+
+def _missing_fields(trip_data):
+    return [f for f in REQUIRED_FIELDS if f not in trip_data]
+
+
+def _invalid_stops(trip_data):
+    """Error message for a malformed ``stops`` list, or None if it is valid."""
+    stops = trip_data.get("stops", [])
+    if not isinstance(stops, list) or not all(
+        isinstance(stop, str) and stop.strip() for stop in stops
+    ):
+        return "stops must be a list of location names"
+    if len(stops) > RoutePlanner.MAX_STOPS:
+        return f"At most {RoutePlanner.MAX_STOPS} stops are supported"
+    return None
+
+
+def _invalid_optimize_stops(trip_data):
+    """Error message unless ``optimize_stops`` is absent or a JSON boolean."""
+    if not isinstance(trip_data.get("optimize_stops", False), bool):
+        return "optimize_stops must be true or false"
+    return None
+
+
+def _build_trip(user, trip_data, trip_plan):
+    """Unsaved Trip for a plan returned by RoutePlanner."""
+    return Trip(
+        user=user,
+        current_location=trip_data["current_location"],
+        pickup_location=trip_data["pickup_location"],
+        dropoff_location=trip_data["dropoff_location"],
+        stops=trip_plan.get("stops", []),
+        current_cycle_used=Decimal(str(trip_data["current_cycle_used"])),
+        total_distance=Decimal(str(trip_plan["total_distance"])),
+        estimated_duration=Decimal(str(trip_plan["total_duration"])),
+        deadhead_distance=Decimal(str(trip_plan.get("deadhead_distance", 0))),
+        route_geometry=trip_plan.get("route_geometry"),
+        current_coords=trip_plan["markers"].get("current"),
+        pickup_coords=trip_plan["markers"].get("pickup"),
+        dropoff_coords=trip_plan["markers"].get("dropoff"),
+        stop_coords=trip_plan["markers"].get("stops") or None,
+    )
+
+
+def _build_legs(trip, trip_plan):
+    return [
+        TripLeg(
+            trip=trip,
+            sequence=leg_data["sequence"],
+            start_location=leg_data.get("start_location", ""),
+            end_location=leg_data.get("end_location", ""),
+            distance=Decimal(str(leg_data["distance"])),
+            duration=Decimal(str(leg_data["duration"])),
+            rest_stop=(leg_data.get("type") == "rest"),
+            fueling_stop=(leg_data.get("type") == "fueling"),
+        )
+        for leg_data in trip_plan.get("legs", [])
+    ]
+
+
+def _build_daily_logs(trip, trip_plan):
+    logs = []
+    for log_data in trip_plan.get("daily_logs", []):
+        log_date = log_data["date"]
+        if isinstance(log_date, str):
+            log_date = datetime.strptime(log_date, "%Y-%m-%d").date()
+
+        logs.append(
+            DailyLog(
+                trip=trip,
+                day_number=log_data["day_number"],
+                date=log_date,
+                total_hours=Decimal(str(log_data["total_hours"])),
+                driving_hours=Decimal(str(log_data["driving_hours"])),
+                off_duty_hours=Decimal(str(log_data["off_duty_hours"])),
+                sleeper_berth_hours=Decimal(str(log_data["sleeper_berth_hours"])),
+            )
+        )
+    return logs
+
+
+def _driving_hours(logs):
+    return sum((log.driving_hours for log in logs), Decimal("0"))
+
+
+def _save_trip_plan(trip_data, trip_plan):
+    """Save a planned trip with its legs and logs and add it to the stats.
+
+    Runs in a single transaction so a failure part-way never leaves a trip
+    without its children or out of step with the aggregates. The async view
+    calls this through sync_to_async, as the async ORM can't join an atomic
+    block.
+    """
+    default_user, _ = User.objects.get_or_create(**DEFAULT_USER_KWARGS)
+
+    with transaction.atomic():
+        trip = _build_trip(default_user, trip_data, trip_plan)
+        trip.save()
+        TripLeg.objects.bulk_create(_build_legs(trip, trip_plan))
+        logs = DailyLog.objects.bulk_create(_build_daily_logs(trip, trip_plan))
+        record_trip(trip, _driving_hours(logs))
+    return trip
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class TripViewSet(viewsets.ModelViewSet):
     queryset = Trip.objects.all()
     serializer_class = TripSerializer
     permission_classes = [AllowAny]
 
+    def perform_update(self, serializer):
+        # Swap the trip's old contribution for the new one. Both are read
+        # back from the database, so the serializer's float fields come back
+        # as Decimals.
+        with transaction.atomic():
+            forget_trip(Trip.objects.get(pk=serializer.instance.pk))
+            record_trip(Trip.objects.get(pk=serializer.save().pk))
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            forget_trip(instance)
+            instance.delete()
+
     @action(detail=False, methods=["post"])
     def plan_trip(self, request):
         try:
-            planner = RoutePlanner()
+            planner = get_route_planner()
             trip_data = request.data
 
             # Validate input
-            required_fields = [
-                "current_location",
-                "pickup_location",
-                "dropoff_location",
-                "current_cycle_used",
-            ]
-            missing_fields = [f for f in required_fields if f not in trip_data]
+            missing_fields = _missing_fields(trip_data)
             if missing_fields:
                 return Response(
                     {"error": "Missing required fields", "missing_fields": missing_fields},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
+            stops_error = _invalid_stops(trip_data) or _invalid_optimize_stops(trip_data)
+            if stops_error:
+                return Response(
+                    {"error": stops_error}, status=status.HTTP_400_BAD_REQUEST
+                )
 
             # Plan trip
             trip_plan = planner.plan_trip_with_rest_stops(trip_data)
@@ -47,58 +197,8 @@ class TripViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Get or create default user
-            default_user, _ = User.objects.get_or_create(
-                username="default_user",
-                defaults={
-                    "email": "default@example.com",
-                    "password": "defaultpassword123",
-                },
-            )
-
-            # Save Trip
-            trip = Trip.objects.create(
-                user=default_user,
-                current_location=trip_data["current_location"],
-                pickup_location=trip_data["pickup_location"],
-                dropoff_location=trip_data["dropoff_location"],
-                current_cycle_used=Decimal(str(trip_data["current_cycle_used"])),
-                total_distance=Decimal(str(trip_plan["total_distance"])),
-                estimated_duration=Decimal(str(trip_plan["total_duration"])),
-                route_geometry=trip_plan.get("route_geometry"),
-                current_coords=trip_plan["markers"].get("current"),
-                pickup_coords=trip_plan["markers"].get("pickup"),
-                dropoff_coords=trip_plan["markers"].get("dropoff"),
-            )
-
-            # Save Legs
-            for leg_data in trip_plan.get("legs", []):
-                TripLeg.objects.create(
-                    trip=trip,
-                    sequence=leg_data["sequence"],
-                    start_location=leg_data.get("start_location", ""),
-                    end_location=leg_data.get("end_location", ""),
-                    distance=Decimal(str(leg_data["distance"])),
-                    duration=Decimal(str(leg_data["duration"])),
-                    rest_stop=(leg_data.get("type") == "rest"),
-                    fueling_stop=(leg_data.get("type") == "fueling"),
-                )
-
-            # Save Logs
-            for log_data in trip_plan.get("daily_logs", []):
-                log_date = log_data["date"]
-                if isinstance(log_date, str):
-                    log_date = datetime.strptime(log_date, "%Y-%m-%d").date()
-
-                DailyLog.objects.create(
-                    trip=trip,
-                    day_number=log_data["day_number"],
-                    date=log_date,
-                    total_hours=Decimal(str(log_data["total_hours"])),
-                    driving_hours=Decimal(str(log_data["driving_hours"])),
-                    off_duty_hours=Decimal(str(log_data["off_duty_hours"])),
-                    sleeper_berth_hours=Decimal(str(log_data["sleeper_berth_hours"])),
-                )
+            # Save Trip, Legs and Logs
+            trip = _save_trip_plan(trip_data, trip_plan)
 
             # Serialize Response
             serializer = self.get_serializer(trip)
@@ -108,4 +208,166 @@ class TripViewSet(viewsets.ModelViewSet):
             traceback.print_exc()
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+def _serialize_trip(trip_id):
+    trip = Trip.objects.prefetch_related("legs", "daily_logs").get(pk=trip_id)
+    return TripSerializer(trip).data
+
+
+@csrf_exempt
+async def plan_trip_async(request):
+    """Async counterpart of TripViewSet.plan_trip for the ASGI deployment.
+
+    ORS calls are awaited through AsyncRoutePlanner, so the worker's event
+    loop is never blocked while a plan waits on the network. The short
+    transactional save runs in a thread. Request and response bodies match the sync endpoint.
+
+    Under WSGI Django runs each call in its own short-lived event loop, so
+    the pooled process-wide client can't be reused there; those requests get
+    a client of their own that is closed before returning.
+    """
+    if request.method != "POST":
+        return JsonResponse(
+            {"detail": f'Method "{request.method}" not allowed.'},
+            status=status.HTTP_405_METHOD_NOT_ALLOWED,
+        )
+
+    try:
+        trip_data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse(
+            {"error": "Request body must be valid JSON"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if isinstance(request, ASGIRequest):
+        return await _plan_trip_async(trip_data)
+    async with new_async_client() as client:
+        return await _plan_trip_async(trip_data, client)
+
+
+async def _plan_trip_async(trip_data, client=None):
+    try:
+        if client is None:
+            planner = get_async_route_planner()
+        else:
+            planner = AsyncRoutePlanner(client=client)
+
+        # Validate input
+        missing_fields = _missing_fields(trip_data)
+        if missing_fields:
+            return JsonResponse(
+                {"error": "Missing required fields", "missing_fields": missing_fields},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        stops_error = _invalid_stops(trip_data) or _invalid_optimize_stops(trip_data)
+        if stops_error:
+            return JsonResponse(
+                {"error": stops_error}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Plan trip
+        trip_plan = await planner.plan_trip_with_rest_stops(trip_data)
+        if not trip_plan:
+            return JsonResponse(
+                {"error": "Failed to calculate route"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Save Trip, Legs and Logs
+        trip = await sync_to_async(_save_trip_plan)(trip_data, trip_plan)
+
+        # Serialize Response (serializers walk related managers synchronously)
+        data = await sync_to_async(_serialize_trip)(trip.pk)
+        return JsonResponse(data)
+
+    except Exception as e:
+        traceback.print_exc()
+        return JsonResponse(
+            {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+# ---------------------- Stats ----------------------
+# Served entirely from the aggregate tables maintained by trips.stats, so the
+# cost of a request depends on the rows returned, not on trip history. Rows
+# left at zero trips by deletes or archiving are kept (removing them would
+# race with concurrent plans) but not served.
+
+
+def _query_date(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        # Well formed but impossible, e.g. 2026-13-01.
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Expected a date in YYYY-MM-DD format"})
+    return parsed
+
+
+def _query_limit(request):
+    value = request.query_params.get("limit")
+    if value is None:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValidationError({"limit": "Expected a positive integer"})
+    return limit
+
+
+class DailyFleetStatsViewSet(viewsets.ReadOnlyModelViewSet):
+    """Fleet totals per day. Filter with ``?start=YYYY-MM-DD&end=YYYY-MM-DD``."""
+
+    queryset = DailyFleetStats.objects.filter(trip_count__gt=0).order_by("date")
+    serializer_class = DailyFleetStatsSerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        start = _query_date(self.request, "start")
+        end = _query_date(self.request, "end")
+        if start:
+            queryset = queryset.filter(date__gte=start)
+        if end:
+            queryset = queryset.filter(date__lte=end)
+        return queryset
+
+
+class LaneStatsViewSet(viewsets.ReadOnlyModelViewSet):
+    """Totals per pickup → dropoff lane, busiest first. Cap with ``?limit=N``."""
+
+    queryset = LaneStats.objects.filter(trip_count__gt=0).order_by("-trip_count", "id")
+    serializer_class = LaneStatsSerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        limit = _query_limit(self.request)
+        return queryset[:limit] if limit and self.action == "list" else queryset
+
+
+class DriverStatsViewSet(viewsets.ReadOnlyModelViewSet):
+    """Totals per driver, busiest first. Cap with ``?limit=N``."""
+
+    queryset = (
+        DriverStats.objects.filter(trip_count__gt=0)
+        .select_related("user")
+        .order_by("-trip_count", "id")
+    )
+    serializer_class = DriverStatsSerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        limit = _query_limit(self.request)
+        return queryset[:limit] if limit and self.action == "list" else queryset
+